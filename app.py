@@ -2,6 +2,9 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import sqlite3
+import os
+import math
+import threading
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -11,115 +14,424 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# --- Custom CSS for Sidebar Gradient ---
-st.markdown("""
+# --- Static Assets ---
+# Images are passed to Streamlit as URLs, so the browser fetches (and caches)
+# them directly and the server never downloads or re-sends the bytes.
+LOGO_URL = "https://placehold.co/200x100/FF375E/FFFFFF?text=Company+Logo"
+BANNER_URL = "https://placehold.co/1200x200/4F008C/FFFFFF?text=HR+Analytics+Insights"
+
+SIDEBAR_CSS = """
 <style>
     [data-testid="stSidebar"] {
         background-image: linear-gradient(to bottom, #4F008C, #000);
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+# --- Custom CSS for Sidebar Gradient ---
+st.markdown(SIDEBAR_CSS, unsafe_allow_html=True)
 
 # --- Database Connection ---
 DB_PATH = 'hr_database.db'
+# Must match SCHEMA_VERSION in setup_database.py.
+SCHEMA_VERSION = 1
+
+# The row-level frame from `load_employees` only feeds the scatter plot, so it
+# loads just the columns that chart reads; the raw table has ~35.
+EMPLOYEE_COLUMNS = [
+    'Department', 'JobRole', 'MonthlyIncome',
+    'PerformanceRating', 'JobSatisfaction', 'YearsAtCompany'
+]
+
+# Low-cardinality text columns, loaded as pandas categoricals so the cached
+# frame stays small and the department mask compares integer codes.
+CATEGORY_COLUMNS = ['Department', 'JobRole']
 
+# Employees added from the sidebar form have no JobSatisfaction or
+# YearsAtCompany, which would otherwise turn those columns into floats.
+# Nullable Int64 keeps them as whole numbers (blank where missing) and accepts
+# any value SQLite can store, so an unusually large income can't break the load.
+NUMERIC_DTYPES = {
+    'EmployeeID': 'Int64',
+    'Age': 'Int64',
+    'MonthlyIncome': 'Int64',
+    'PerformanceRating': 'Int64',
+    'JobSatisfaction': 'Int64',
+    'YearsAtCompany': 'Int64',
+}
+
+@st.cache_resource
 def get_connection():
-    """Establishes a connection to the SQLite database."""
-    return sqlite3.connect(DB_PATH)
+    """Opens one shared connection to the SQLite database.
+
+    The connection is cached for the life of the server, so reruns keep
+    SQLite's page cache warm instead of reopening the file every query.
+    """
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+@st.cache_resource
+def get_db_lock():
+    """Returns the lock that serializes every use of the shared connection.
 
-def run_query(query, params=None):
+    All sessions share one connection, so without it a second writer would hit
+    "cannot start a transaction within a transaction" and readers could see
+    another session's uncommitted write.
+    """
+    return threading.Lock()
+
+def db_mtime():
+    """Returns the latest modification time of the database and its WAL file."""
+    wal_path = DB_PATH + '-wal'
+    mtime = os.path.getmtime(DB_PATH)
+    if os.path.exists(wal_path):
+        mtime = max(mtime, os.path.getmtime(wal_path))
+    return mtime
+
+def run_query(query, params=None, dtype=None):
     """Runs a SQL query and returns the result as a DataFrame."""
-    with get_connection() as conn:
-        return pd.read_sql_query(query, conn, params=params)
+    with get_db_lock():
+        return pd.read_sql_query(query, get_connection(), params=params, dtype=dtype)
+
+def fetch_rows(query, params=None):
+    """Runs a SQL query and returns the raw result rows as a list of tuples."""
+    with get_db_lock():
+        return get_connection().execute(query, params or []).fetchall()
 
 def execute_query(query, params=None):
-    """Executes a non-select SQL query (INSERT, UPDATE)."""
-    with get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(query, params or [])
-        conn.commit()
+    """Executes a non-select SQL query (INSERT, UPDATE) in its own transaction."""
+    conn = get_connection()
+    with get_db_lock():
+        conn.execute("BEGIN")
+        try:
+            conn.execute(query, params or [])
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+    # Any write makes the cached employee table and aggregates stale.
+    st.cache_data.clear()
+
+@st.cache_data(show_spinner=False)
+def load_employees(mtime):
+    """Loads the EMPLOYEE_COLUMNS of every employee, cached until the database changes.
+
+    `mtime` is only used as the cache key, so reruns that don't touch the
+    database skip the full-table read.
+    """
+    return run_query(
+        f"SELECT {', '.join(EMPLOYEE_COLUMNS)} FROM employees",
+        dtype={
+            **{col: NUMERIC_DTYPES[col] for col in EMPLOYEE_COLUMNS if col in NUMERIC_DTYPES},
+            **{col: 'category' for col in CATEGORY_COLUMNS}
+        }
+    )
+
+@st.cache_data(show_spinner=False)
+def load_options(mtime):
+    """Returns the sorted sidebar options, computed once per database version.
+
+    Returns a tuple of (departments, job roles, employee IDs, max employee ID).
+    Departments and roles come from the small `employee_counts` table and the
+    IDs are read in order from the EmployeeID index, so the max ID is simply
+    the last one.
+    """
+    departments = [row[0] for row in fetch_rows("SELECT DISTINCT Department FROM employee_counts ORDER BY Department")]
+    job_roles = [row[0] for row in fetch_rows("SELECT DISTINCT JobRole FROM employee_counts ORDER BY JobRole")]
+    employee_ids = [row[0] for row in fetch_rows("SELECT EmployeeID FROM employees ORDER BY EmployeeID")]
+    max_employee_id = employee_ids[-1] if employee_ids else 0
+    return departments, job_roles, employee_ids, max_employee_id
+
+# --- Aggregate Queries ---
+# KPIs and chart inputs are read from `employee_counts`, a small table of
+# counts per (Department, JobRole, PerformanceRating, Attrition, OverTime)
+# that setup_database.py builds and triggers keep in sync with `employees`.
+# Each query has a {department_filter} slot, filled in by `department_filter`.
+KPI_QUERY = """
+SELECT SUM(Count) AS TotalEmployees,
+       1.0 * SUM(TotalIncome) / SUM(IncomeCount) AS AvgIncome,
+       100.0 * SUM((Attrition = 'Yes') * Count) / SUM(Count) AS AttritionRate
+FROM employee_counts WHERE {department_filter}
+"""
+ROLE_COUNTS_QUERY = """
+SELECT JobRole, SUM(Count) AS Count FROM employee_counts WHERE {department_filter}
+GROUP BY JobRole ORDER BY Count DESC
+"""
+PERF_COUNTS_QUERY = """
+SELECT PerformanceRating, SUM(Count) AS Count FROM employee_counts WHERE {department_filter}
+GROUP BY PerformanceRating ORDER BY Count DESC
+"""
+ATTRITION_COUNTS_QUERY = """
+SELECT Attrition, SUM(Count) AS Count FROM employee_counts WHERE {department_filter}
+GROUP BY Attrition ORDER BY Count DESC
+"""
+OVERTIME_ATTRITION_QUERY = """
+SELECT OverTime, Attrition, SUM(Count) AS Count FROM employee_counts WHERE {department_filter}
+GROUP BY OverTime, Attrition ORDER BY OverTime, Attrition
+"""
+PERF_ATTRITION_QUERY = """
+SELECT PerformanceRating, Attrition, SUM(Count) AS Count FROM employee_counts WHERE {department_filter}
+GROUP BY PerformanceRating, Attrition ORDER BY PerformanceRating, Attrition
+"""
+# Above SCATTER_MAX_POINTS rows the scatter plot switches from one mark per
+# employee to one mark per (JobSatisfaction, PerformanceRating) group.
+SCATTER_MAX_POINTS = 5000
+SCATTER_POINTS_QUERY = """
+SELECT COUNT(*) FROM employees WHERE {department_filter} AND YearsAtCompany IS NOT NULL
+"""
+SCATTER_GROUPS_QUERY = """
+SELECT JobSatisfaction, PerformanceRating,
+       AVG(MonthlyIncome) AS MonthlyIncome,
+       AVG(YearsAtCompany) AS YearsAtCompany,
+       COUNT(*) AS Employees
+FROM employees WHERE {department_filter} AND YearsAtCompany IS NOT NULL
+GROUP BY JobSatisfaction, PerformanceRating
+"""
+
+def department_filter(department):
+    """Returns the (SQL condition, params) that restrict a query to one department.
+
+    'All' gets no condition at all rather than an `? IS NULL OR ...` test, so
+    SQLite can use the Department index whenever a department is selected.
+    """
+    if department == 'All':
+        return '1', ()
+    return 'Department = ?', (department,)
+
+@st.cache_data(show_spinner=False)
+def run_department_query(query, department, mtime):
+    """Runs an aggregate query for one department ('All' for every employee).
+
+    Cached on the same `mtime` key as `load_employees`.
+    """
+    condition, params = department_filter(department)
+    return run_query(query.format(department_filter=condition), params)
+
+@st.cache_data(show_spinner=False)
+def load_kpis(department, mtime):
+    """Returns (total employees, average income, attrition rate) for one department.
+
+    The KPI query yields a single row of plain numbers, so it is fetched
+    straight from the cursor instead of being built into a DataFrame.
+    """
+    condition, params = department_filter(department)
+    total_employees, avg_income, attrition_rate = fetch_rows(KPI_QUERY.format(department_filter=condition), params)[0]
+    if not total_employees:
+        return 0, 0, 0
+    return total_employees, int(avg_income) if avg_income is not None else 0, attrition_rate
+
+# --- Employee Details Page ---
+# The details table only ever fetches one page of rows from SQLite, so the
+# browser never receives the whole (filtered) table.
+DETAILS_PAGE_SIZE = 50
+DETAILS_COLUMNS = [
+    'EmployeeID', 'Age', 'Department', 'JobRole', 'MonthlyIncome',
+    'PerformanceRating', 'JobSatisfaction', 'YearsAtCompany', 'Attrition', 'OverTime'
+]
+DETAILS_PAGE_QUERY = f"""
+SELECT {', '.join(DETAILS_COLUMNS)} FROM employees WHERE {{department_filter}}
+ORDER BY EmployeeID LIMIT ? OFFSET ?
+"""
+
+@st.cache_data(show_spinner=False)
+def load_details_page(department, page, mtime):
+    """Returns one page (1-based) of employee rows for the details table."""
+    condition, params = department_filter(department)
+    return run_query(
+        DETAILS_PAGE_QUERY.format(department_filter=condition),
+        params=(*params, DETAILS_PAGE_SIZE, DETAILS_PAGE_SIZE * (page - 1)),
+        dtype=NUMERIC_DTYPES
+    )
+
+# --- Chart Builders ---
+# Plotly figure construction is the slowest part of a rerun, so each chart is
+# cached per (department, mtime) and only rebuilt when either changes.
+@st.cache_data(show_spinner=False)
+def build_role_bar(department, mtime):
+    """Bar Chart: Employee Count by Job Role."""
+    role_counts = run_department_query(ROLE_COUNTS_QUERY, department, mtime)
+    fig = px.bar(
+        role_counts, x='Count', y='JobRole', orientation='h',
+        title=f"Distribution of Job Roles",
+        color_discrete_sequence=['#4F008C']
+    )
+    fig.update_layout(yaxis={'categoryorder':'total ascending'})
+    return fig
+
+@st.cache_data(show_spinner=False)
+def build_perf_bar(department, mtime):
+    """Bar Chart: Performance Rating Distribution."""
+    perf_counts = run_department_query(PERF_COUNTS_QUERY, department, mtime)
+    return px.bar(
+        perf_counts, x='PerformanceRating', y='Count',
+        title="Count of Employees by Performance Rating",
+        color_discrete_sequence=['#FF375E']
+    )
+
+@st.cache_data(show_spinner=False)
+def build_income_scatter(department, mtime):
+    """Scatter Plot: Income vs. Job Satisfaction, sized by tenure."""
+    # Sending thousands of individual marks to the browser is what makes this
+    # chart slow, so large selections are plotted as group averages instead.
+    # The point count comes from SQLite, so that path never loads the rows.
+    condition, params = department_filter(department)
+    num_points = fetch_rows(SCATTER_POINTS_QUERY.format(department_filter=condition), params)[0][0]
+    if num_points > SCATTER_MAX_POINTS:
+        scatter_groups = run_department_query(SCATTER_GROUPS_QUERY, department, mtime)
+        return px.scatter(
+            scatter_groups, x='MonthlyIncome', y='JobSatisfaction',
+            color='PerformanceRating',
+            title="Average Income vs. Job Satisfaction, Colored by Performance",
+            size='Employees', hover_data=['YearsAtCompany']
+        )
+
+    df = load_employees(mtime)
+    if department != 'All':
+        # Compare the categorical codes against one integer, not every string.
+        departments = df['Department']
+        df = df[departments.cat.codes.to_numpy() == departments.cat.categories.get_loc(department)]
+
+    # FIX: The 'size' parameter for the scatter plot cannot handle missing values (NaN).
+    # We create a temporary, cleaned dataframe by dropping rows where 'YearsAtCompany' is null
+    # before passing it to the plotting function. This resolves the ValueError.
+    scatter_df = df.dropna(subset=['YearsAtCompany'])
+
+    return px.scatter(
+        scatter_df, x='MonthlyIncome', y='JobSatisfaction',
+        color='PerformanceRating',
+        title="Income vs. Job Satisfaction, Colored by Performance",
+        size='YearsAtCompany', hover_name='JobRole'
+    )
+
+@st.cache_data(show_spinner=False)
+def build_attrition_pie(department, mtime):
+    """Pie Chart: Attrition Breakdown."""
+    attrition_counts = run_department_query(ATTRITION_COUNTS_QUERY, department, mtime)
+    return px.pie(
+        attrition_counts, names='Attrition', values='Count',
+        title=f"Attrition Breakdown",
+        hole=0.4,
+        color='Attrition',
+        color_discrete_map={'Yes': '#FF375E', 'No': '#4F008C'}
+    )
+
+@st.cache_data(show_spinner=False)
+def build_overtime_bar(department, mtime):
+    """Bar Chart: Attrition Rate by Overtime. Returns None if nobody has left."""
+    overtime_counts = run_department_query(OVERTIME_ATTRITION_QUERY, department, mtime)
+    overtime_attrition = overtime_counts.pivot(index='OverTime', columns='Attrition', values='Count').fillna(0)
+    overtime_attrition = overtime_attrition.div(overtime_attrition.sum(axis=1), axis=0)
+    if 'Yes' not in overtime_attrition.columns:
+        return None
+    overtime_attrition = (overtime_attrition['Yes'] * 100).reset_index()
+    overtime_attrition.columns = ['OverTime', 'Attrition Rate (%)']
+    return px.bar(
+        overtime_attrition, x='OverTime', y='Attrition Rate (%)',
+        title="Overtime vs. Attrition Rate",
+        color_discrete_sequence=['#FF375E']
+    )
+
+@st.cache_data(show_spinner=False)
+def build_perf_attrition_bar(department, mtime):
+    """Grouped Bar Chart: Attrition Count by Performance Rating."""
+    perf_attrition = run_department_query(PERF_ATTRITION_QUERY, department, mtime)
+    return px.bar(
+        perf_attrition, x='PerformanceRating', y='Count', color='Attrition',
+        title='Attrition Count by Performance Rating',
+        barmode='group',
+        color_discrete_map={'Yes': '#FF375E', 'No': '#4F008C'}
+    )
 
 # --- Load Initial Data ---
 try:
-    df = run_query("SELECT * FROM employees")
+    data_mtime = db_mtime()
+    if fetch_rows("PRAGMA user_version")[0][0] < SCHEMA_VERSION:
+        raise RuntimeError("the database was built by an older version of setup_database.py.")
+    departments, job_roles, employee_ids, max_employee_id = load_options(data_mtime)
 except Exception as e:
     st.error(f"Failed to load data from the database: {e}")
     st.info("Please ensure you have run 'python setup_database.py' to create the database.")
     st.stop()
 
 # --- Sidebar ---
-st.sidebar.image("https://placehold.co/200x100/FF375E/FFFFFF?text=Company+Logo", use_container_width=True)
+st.sidebar.image(LOGO_URL, use_container_width=True)
 st.sidebar.header("Dashboard Filters & Actions")
 
 # 1. Department Filter
 department = st.sidebar.selectbox(
     "Select a Department:",
-    options=['All'] + sorted(df['Department'].unique().tolist())
+    options=['All'] + departments
 )
 
-# Filter data based on selection
-if department != 'All':
-    df_filtered = df[df['Department'] == department]
-else:
-    df_filtered = df.copy()
-
 # 2. Add New Employee Form
-with st.sidebar.form("new_employee_form", clear_on_submit=True):
-    st.subheader("Add New Employee")
-    new_id = st.number_input("Employee ID", min_value=df['EmployeeID'].max() + 1, step=1)
-    new_age = st.number_input("Age", min_value=18, max_value=100, step=1)
-    new_dept = st.selectbox("Department", options=sorted(df['Department'].unique().tolist()))
-    new_role = st.selectbox("Job Role", options=sorted(df['JobRole'].unique().tolist()))
-    new_income = st.number_input("Monthly Income", min_value=1000, step=100)
-    
-    submitted = st.form_submit_button("Add Employee")
-    if submitted:
-        try:
-            # Basic validation
-            if new_id and new_age and new_dept and new_role and new_income:
-                query = """
-                INSERT INTO employees (EmployeeID, Age, Department, JobRole, MonthlyIncome, Attrition, Gender, Overtime, PerformanceRating) 
-                VALUES (?, ?, ?, ?, ?, 'No', 'N/A', 'No', 3)
-                """
-                execute_query(query, (new_id, new_age, new_dept, new_role, new_income))
-                st.sidebar.success(f"Employee {new_id} added successfully!")
-                # NEW: Force the app to rerun to show the new entry immediately
-                st.rerun()
-            else:
-                st.sidebar.error("Please fill all fields.")
-        except sqlite3.IntegrityError:
-             st.sidebar.error(f"Employee ID {new_id} already exists.")
-        except Exception as e:
-            st.sidebar.error(f"An error occurred: {e}")
+# The forms run as fragments: a rejected submission only reruns the form
+# itself, and a successful write triggers a full rerun to refresh the data.
+@st.fragment
+def add_employee_form(departments, job_roles, max_employee_id):
+    """Sidebar form for adding a new employee record."""
+    with st.form("new_employee_form", clear_on_submit=True):
+        st.subheader("Add New Employee")
+        new_id = st.number_input("Employee ID", min_value=max_employee_id + 1, step=1)
+        new_age = st.number_input("Age", min_value=18, max_value=100, step=1)
+        new_dept = st.selectbox("Department", options=departments)
+        new_role = st.selectbox("Job Role", options=job_roles)
+        new_income = st.number_input("Monthly Income", min_value=1000, step=100)
+        
+        submitted = st.form_submit_button("Add Employee")
+        if submitted:
+            try:
+                # Basic validation
+                if new_id and new_age and new_dept and new_role and new_income:
+                    query = """
+                    INSERT INTO employees (EmployeeID, Age, Department, JobRole, MonthlyIncome, Attrition, Gender, Overtime, PerformanceRating) 
+                    VALUES (?, ?, ?, ?, ?, 'No', 'N/A', 'No', 3)
+                    """
+                    execute_query(query, (new_id, new_age, new_dept, new_role, new_income))
+                    st.success(f"Employee {new_id} added successfully!")
+                    # NEW: Force the app to rerun to show the new entry immediately
+                    st.rerun()
+                else:
+                    st.error("Please fill all fields.")
+            except sqlite3.IntegrityError:
+                 st.error(f"Employee ID {new_id} already exists.")
+            except Exception as e:
+                st.error(f"An error occurred: {e}")
 
 # 3. Update Employee Income
-with st.sidebar.form("update_income_form", clear_on_submit=True):
-    st.subheader("Update Employee Income")
-    emp_to_update = st.selectbox(
-        "Select Employee ID to Update",
-        options=sorted(df['EmployeeID'].unique().tolist())
-    )
-    new_monthly_income = st.number_input("New Monthly Income", min_value=1000, step=100)
-    
-    update_submitted = st.form_submit_button("Update Income")
-    if update_submitted:
-        try:
-            query = "UPDATE employees SET MonthlyIncome = ? WHERE EmployeeID = ?"
-            execute_query(query, (new_monthly_income, emp_to_update))
-            st.sidebar.success(f"Income for Employee ID {emp_to_update} updated!")
-            # NEW: Force the app to rerun to show the updated income
-            st.rerun()
-        except Exception as e:
-            st.sidebar.error(f"Failed to update income: {e}")
+@st.fragment
+def update_income_form(employee_ids):
+    """Sidebar form for updating an existing employee's monthly income."""
+    with st.form("update_income_form", clear_on_submit=True):
+        st.subheader("Update Employee Income")
+        emp_to_update = st.selectbox(
+            "Select Employee ID to Update",
+            options=employee_ids
+        )
+        new_monthly_income = st.number_input("New Monthly Income", min_value=1000, step=100)
+        
+        update_submitted = st.form_submit_button("Update Income")
+        if update_submitted:
+            try:
+                query = "UPDATE employees SET MonthlyIncome = ? WHERE EmployeeID = ?"
+                execute_query(query, (new_monthly_income, emp_to_update))
+                st.success(f"Income for Employee ID {emp_to_update} updated!")
+                # NEW: Force the app to rerun to show the updated income
+                st.rerun()
+            except Exception as e:
+                st.error(f"Failed to update income: {e}")
+
+with st.sidebar:
+    add_employee_form(departments, job_roles, max_employee_id)
+    update_income_form(employee_ids)
 
 # --- Main Dashboard ---
 st.title(f"📊 HR Analytics Dashboard: {department}")
-st.image("https://placehold.co/1200x200/4F008C/FFFFFF?text=HR+Analytics+Insights", use_container_width=True)
+st.image(BANNER_URL, use_container_width=True)
 
 # --- Key Metrics (KPIs) ---
-total_employees = df_filtered.shape[0]
-avg_income = int(df_filtered['MonthlyIncome'].mean())
-attrition_rate = (df_filtered[df_filtered['Attrition'] == 'Yes'].shape[0] / total_employees * 100) if total_employees > 0 else 0
+total_employees, avg_income, attrition_rate = load_kpis(department, data_mtime)
 
 kpi1, kpi2, kpi3 = st.columns(3)
 kpi1.metric(label="Total Employees", value=f"{total_employees}")
@@ -136,46 +448,15 @@ with tab1:
     col1, col2 = st.columns(2)
     
     with col1:
-        # Bar Chart: Employee Count by Job Role
         st.subheader("Employee Count by Job Role")
-        role_counts = df_filtered['JobRole'].value_counts().reset_index()
-        role_counts.columns = ['JobRole', 'Count']
-        
-        fig_bar = px.bar(
-            role_counts, x='Count', y='JobRole', orientation='h',
-            title=f"Distribution of Job Roles",
-            color_discrete_sequence=['#4F008C']
-        )
-        fig_bar.update_layout(yaxis={'categoryorder':'total ascending'})
-        st.plotly_chart(fig_bar, use_container_width=True)
+        st.plotly_chart(build_role_bar(department, data_mtime), use_container_width=True)
 
     with col2:
-        # Bar Chart: Performance Rating Distribution
         st.subheader("Performance Rating Distribution")
-        perf_counts = df_filtered['PerformanceRating'].value_counts().reset_index()
-        perf_counts.columns = ['PerformanceRating', 'Count']
-        
-        fig_perf = px.bar(
-            perf_counts, x='PerformanceRating', y='Count',
-            title="Count of Employees by Performance Rating",
-            color_discrete_sequence=['#FF375E']
-        )
-        st.plotly_chart(fig_perf, use_container_width=True)
+        st.plotly_chart(build_perf_bar(department, data_mtime), use_container_width=True)
 
     st.subheader("Income vs. Job Satisfaction")
-    
-    # FIX: The 'size' parameter for the scatter plot cannot handle missing values (NaN).
-    # We create a temporary, cleaned dataframe by dropping rows where 'YearsAtCompany' is null
-    # before passing it to the plotting function. This resolves the ValueError.
-    scatter_df = df_filtered.dropna(subset=['YearsAtCompany'])
-
-    fig_scatter = px.scatter(
-        scatter_df, x='MonthlyIncome', y='JobSatisfaction',
-        color='PerformanceRating',
-        title="Income vs. Job Satisfaction, Colored by Performance",
-        size='YearsAtCompany', hover_name='JobRole'
-    )
-    st.plotly_chart(fig_scatter, use_container_width=True)
+    st.plotly_chart(build_income_scatter(department, data_mtime), use_container_width=True)
 
 with tab2:
     st.header("Attrition Deep Dive")
@@ -184,32 +465,14 @@ with tab2:
     col1, col2 = st.columns(2)
 
     with col1:
-        # Pie Chart: Attrition Breakdown
         st.subheader("Overall Attrition Breakdown")
-        attrition_counts = df_filtered['Attrition'].value_counts().reset_index()
-        attrition_counts.columns = ['Attrition', 'Count']
-        
-        fig_pie = px.pie(
-            attrition_counts, names='Attrition', values='Count',
-            title=f"Attrition Breakdown",
-            hole=0.4,
-            color='Attrition',
-            color_discrete_map={'Yes': '#FF375E', 'No': '#4F008C'}
-        )
-        st.plotly_chart(fig_pie, use_container_width=True)
+        st.plotly_chart(build_attrition_pie(department, data_mtime), use_container_width=True)
 
     with col2:
         # NEW CHART: Attrition by Overtime
         st.subheader("Attrition Rate by Overtime")
-        overtime_attrition = df_filtered.groupby('OverTime')['Attrition'].value_counts(normalize=True).unstack().fillna(0)
-        if 'Yes' in overtime_attrition.columns:
-            overtime_attrition = (overtime_attrition['Yes'] * 100).reset_index()
-            overtime_attrition.columns = ['OverTime', 'Attrition Rate (%)']
-            fig_overtime = px.bar(
-                overtime_attrition, x='OverTime', y='Attrition Rate (%)',
-                title="Overtime vs. Attrition Rate",
-                color_discrete_sequence=['#FF375E']
-            )
+        fig_overtime = build_overtime_bar(department, data_mtime)
+        if fig_overtime is not None:
             st.plotly_chart(fig_overtime, use_container_width=True)
         else:
             st.info("No attrition data available for the selected overtime criteria.")
@@ -217,33 +480,20 @@ with tab2:
     st.markdown("---")
     # NEW CHART: Attrition by Performance Rating
     st.subheader("Are We Losing Our Top Performers?")
-    perf_attrition = df_filtered.groupby(['PerformanceRating', 'Attrition']).size().reset_index(name='Count')
-    
-    fig_perf_attr = px.bar(
-        perf_attrition, x='PerformanceRating', y='Count', color='Attrition',
-        title='Attrition Count by Performance Rating',
-        barmode='group',
-        color_discrete_map={'Yes': '#FF375E', 'No': '#4F008C'}
-    )
-    st.plotly_chart(fig_perf_attr, use_container_width=True)
+    st.plotly_chart(build_perf_attrition_bar(department, data_mtime), use_container_width=True)
 
 
 with tab3:
     st.header("Employee Details")
     st.subheader("Browse and Search Raw Data")
-    # Display a subset of columns for clarity
-    display_columns = [
-        'EmployeeID', 'Age', 'Department', 'JobRole', 'MonthlyIncome',
-        'PerformanceRating', 'JobSatisfaction', 'YearsAtCompany', 'Attrition', 'OverTime'
-    ]
-    
+    num_pages = max(1, math.ceil(total_employees / DETAILS_PAGE_SIZE))
+    page = st.number_input(f"Page (of {num_pages})", min_value=1, max_value=num_pages, step=1)
+
     # NEW: Dynamically calculate the height of the dataframe to prevent the last row from being cut off.
     # We'll calculate a height based on 35 pixels per row plus one for the header.
     # We'll also set a maximum height to prevent the table from becoming too long.
-    df_for_display = df_filtered[display_columns]
+    df_for_display = load_details_page(department, page, data_mtime)
     num_rows = len(df_for_display)
     dynamic_height = min((num_rows + 1) * 35, 600) # Max height of 600px
 
     st.dataframe(df_for_display, use_container_width=True, height=dynamic_height)
-
-
@@ -16,12 +16,9 @@
 # pandas: This is the most popular library in Python for working with data.
 #         We use it to read the CSV file and handle the data like a spreadsheet.
 #
-# sqlite3: This library lets Python talk to SQLite databases. We use it to
-#          verify that our data was inserted correctly.
-#
-# sqlalchemy: This is a powerful library that helps pandas write data
-#             directly into a SQL database. It's the engine that connects
-#             our pandas DataFrame to our SQLite database.
+# sqlite3: This library lets Python talk to SQLite databases. pandas uses
+#          the connection it gives us to write our data, and we use it again
+#          to verify that our data was inserted correctly.
 #
 # re: This is Python's "regular expressions" library. It's a tool for
 #     finding and replacing patterns in text, which we use for cleaning
@@ -29,7 +26,6 @@
 #
 import pandas as pd
 import sqlite3
-from sqlalchemy import create_engine
 import re
 
 # --- Step 2: Configuration Settings ---
@@ -39,6 +35,26 @@ import re
 CSV_FILE_PATH = 'WA_Fn-UseC_-HR-Employee-Attrition.csv'     # The name of the raw data file.
 DB_FILE_PATH = 'hr_database.db'                             # The name of the database file we will create.
 TABLE_NAME = 'employees'                                    # The name of the table inside our database.
+COUNTS_TABLE_NAME = 'employee_counts'                       # The table of pre-computed dashboard counts.
+SCHEMA_VERSION = 1                                          # Bump this when the tables change; app.py checks it.
+
+# These are the columns the dashboard charts group by.
+COUNTS_KEY_COLUMNS = ['Department', 'JobRole', 'PerformanceRating', 'Attrition', 'OverTime']
+
+# This query squashes the employees table down to one row per combination of
+# the key columns. Every chart and KPI can then be answered by adding up a
+# few hundred rows, no matter how many employees there are.
+COUNTS_QUERY = f"""
+SELECT {', '.join(COUNTS_KEY_COLUMNS)},
+       COUNT(*) AS Count, COUNT(MonthlyIncome) AS IncomeCount,
+       COALESCE(SUM(MonthlyIncome), 0) AS TotalIncome
+FROM {TABLE_NAME}
+GROUP BY {', '.join(COUNTS_KEY_COLUMNS)}
+"""
+
+# This pattern matches any character that is NOT a number, a letter, or an underscore.
+# We compile it once here so Python doesn't have to rebuild it for every column.
+INVALID_COL_CHARS = re.compile(r'[^0-9a-zA-Z_]')
 
 # --- Step 3: Define a Helper Function for Cleaning ---
 # This function's job is to clean up the column names from the CSV file.
@@ -49,19 +65,10 @@ def clean_col_names(df):
     Cleans the column names of a pandas DataFrame to be safe for a database.
     For example, a column named "Monthly Income ($)" would become "MonthlyIncome".
     """
-    # Get the current list of column names ↓
-    cols = df.columns
-    # Create an empty list to hold the new, cleaned column names
-    new_cols = []
-    # Loop through each column name one by one
-    for col in cols:
-        # Use a regular expression (re.sub) to remove any character that is NOT
-        # a number, a letter, or an underscore.
-        new_col = re.sub(r'[^0-9a-zA-Z_]', '', col)
-        # Check if the column name is not empty after cleaning ↓
-        if new_col:
-            # If it's not empty, add it to our list of new columns ↓
-            new_cols.append(new_col)
+    # Go through each column name one by one and use our compiled regular
+    # expression to remove any character that is NOT a number, a letter, or an underscore.
+    # Names that end up empty after cleaning are skipped ↓
+    new_cols = [new_col for new_col in (INVALID_COL_CHARS.sub('', col) for col in df.columns) if new_col]
     # Replace the old column names in the DataFrame with our new, clean list ↓
     df.columns = new_cols
     # Return the DataFrame with the cleaned column names ↓
@@ -110,16 +117,105 @@ def setup_database():
         print("Column names cleaned.")
 
         # --- Task 4: Connect to the Database ---
-        # We create a database "engine". Think of this as the connection pipeline
-        # that allows pandas to talk to our SQLite database file.  
-        engine = create_engine(f'sqlite:///{DB_FILE_PATH}')
+        # We open a plain sqlite3 connection. Think of this as the connection pipeline
+        # that allows pandas to talk to our SQLite database file.
         print(f"Connecting to database '{DB_FILE_PATH}'...")
+        conn = sqlite3.connect(DB_FILE_PATH)
+        # The database is rebuilt from the CSV every time, so we don't need SQLite
+        # to wait for the disk after every write during this bulk load.
+        conn.execute("PRAGMA synchronous=OFF")
 
         # --- Task 5: Insert Data into the Database Table ---
         # This takes all the data from our DataFrame and writes it to a SQL table.
-        df.to_sql(TABLE_NAME, engine, if_exists='replace', index=False)
+        # With a sqlite3 connection, pandas sends all the rows in one executemany()
+        # call, and the "with conn" block wraps it in a single transaction (one commit).
+        with conn:
+            df.to_sql(TABLE_NAME, conn, if_exists='replace', index=False)
         print(f"Data successfully inserted into '{TABLE_NAME}' table.")
 
+        # --- Task 5b: Add Indexes ---
+        # An index is like the index at the back of a book: it lets SQLite jump
+        # straight to the matching rows instead of reading the whole table.
+        # The scatter plot reads the employees of a single department, and the sidebar
+        # and details table look employees up or page through them by EmployeeID.
+        # The EmployeeID index is also UNIQUE, so the database itself refuses a
+        # duplicate ID.
+        with conn:
+            conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_emp_id ON {TABLE_NAME} (EmployeeID)")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_dept ON {TABLE_NAME} (Department)")
+        # ANALYZE collects statistics so SQLite's query planner knows when to use them.
+        conn.execute("ANALYZE")
+        print("Indexes created.")
+
+        # --- Task 5c: Pre-compute the Dashboard Counts ---
+        # We save the result of COUNTS_QUERY as its own table, so the dashboard
+        # reads these small totals instead of re-counting every employee.
+        #
+        # To keep the totals up to date, triggers adjust just the one group a changed
+        # employee belongs to, instead of re-counting the whole table:
+        #   - adding an employee creates their group if needed, then adds 1 (and their income),
+        #   - removing an employee subtracts 1 (and their income), and drops the group at 0,
+        #   - updating an employee does both: removes the old row, adds the new one.
+        # IncomeCount only counts employees that have an income, so the average income
+        # skips missing values the same way pandas' mean() does.
+        # We match groups with "IS" instead of "=" so empty (NULL) values still match.
+        def match_group(row):
+            return ' AND '.join(f"{col} IS {row}.{col}" for col in COUNTS_KEY_COLUMNS)
+
+        def add_to_group(row):
+            return f"""
+                INSERT INTO {COUNTS_TABLE_NAME} ({', '.join(COUNTS_KEY_COLUMNS)}, Count, IncomeCount, TotalIncome)
+                SELECT {', '.join(f'{row}.{col}' for col in COUNTS_KEY_COLUMNS)}, 0, 0, 0
+                WHERE NOT EXISTS (SELECT 1 FROM {COUNTS_TABLE_NAME} WHERE {match_group(row)});
+                UPDATE {COUNTS_TABLE_NAME}
+                SET Count = Count + 1,
+                    IncomeCount = IncomeCount + ({row}.MonthlyIncome IS NOT NULL),
+                    TotalIncome = TotalIncome + COALESCE({row}.MonthlyIncome, 0)
+                WHERE {match_group(row)};
+            """
+
+        def remove_from_group(row):
+            return f"""
+                UPDATE {COUNTS_TABLE_NAME}
+                SET Count = Count - 1,
+                    IncomeCount = IncomeCount - ({row}.MonthlyIncome IS NOT NULL),
+                    TotalIncome = TotalIncome - COALESCE({row}.MonthlyIncome, 0)
+                WHERE {match_group(row)};
+                DELETE FROM {COUNTS_TABLE_NAME} WHERE {match_group(row)} AND Count <= 0;
+            """
+
+        triggers = {
+            'insert': ('INSERT', add_to_group('NEW')),
+            'delete': ('DELETE', remove_from_group('OLD')),
+            # Only updates to a key column or the income can change the totals.
+            'update': (
+                f"UPDATE OF {', '.join(COUNTS_KEY_COLUMNS)}, MonthlyIncome",
+                remove_from_group('OLD') + add_to_group('NEW')
+            ),
+        }
+
+        with conn:
+            conn.execute(f"DROP TABLE IF EXISTS {COUNTS_TABLE_NAME}")
+            conn.execute(f"CREATE TABLE {COUNTS_TABLE_NAME} AS {COUNTS_QUERY}")
+            # A UNIQUE index on the group columns lets each trigger find its group directly.
+            conn.execute(f"""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_{COUNTS_TABLE_NAME}_group
+            ON {COUNTS_TABLE_NAME} ({', '.join(COUNTS_KEY_COLUMNS)})
+            """)
+            for name, (event, body) in triggers.items():
+                conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS refresh_{COUNTS_TABLE_NAME}_after_{name}
+                AFTER {event} ON {TABLE_NAME}
+                BEGIN
+                    {body}
+                END
+                """)
+        # We stamp the database with a version number so the app can tell when
+        # it was built by an older version of this script.
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.close()
+        print(f"Dashboard counts saved into '{COUNTS_TABLE_NAME}' table.")
+
         # --- Task 6: Verify Everything Worked ---
         # To be extra sure, we will connect to the database directly and count the rows.
         # First, we establish a connection.